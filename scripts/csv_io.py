@@ -0,0 +1,51 @@
+import numpy as np
+import pyarrow as pa
+from pyarrow import csv as pacsv
+
+def _convert_options(path, column_types):
+    """Projecao/tipos so para as colunas de `column_types` presentes no cabecalho do CSV."""
+    with open(path) as f:
+        header = f.readline().strip().split(",")
+    columns = [c for c in column_types if c in header]
+
+    return pacsv.ConvertOptions(
+        include_columns=columns,
+        column_types={c: column_types[c] for c in columns},
+        strings_can_be_null=True,
+    )
+
+def read_columns(path, column_types):
+    """Le so as colunas de `column_types` presentes no CSV, com o leitor multithread do Arrow."""
+    table = pacsv.read_csv(path, convert_options=_convert_options(path, column_types))
+    return table.to_pandas()
+
+def iter_chunks(path, column_types, keys, block_size=1 << 25):
+    """Le o CSV em blocos de ~`block_size` bytes e gera DataFrames so com grupos completos.
+
+    Supoe que as linhas de cada grupo (`keys`) sao contiguas no arquivo, como o
+    benchmark_app escreve; o grupo que fica cortado no fim de um bloco segue para o proximo.
+    """
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=block_size),
+        convert_options=_convert_options(path, column_types),
+    )
+    keys    = [k for k in keys if k in reader.schema.names]
+    pending = []
+
+    for batch in reader:
+        table = pa.Table.from_batches(pending + [batch])
+        df    = table.to_pandas()
+        if len(df) == 0:
+            continue
+
+        # Linhas finais com a mesma chave da ultima linha pertencem a um grupo talvez incompleto
+        same   = (df[keys] == df[keys].iloc[-1]).all(axis=1).to_numpy()
+        n_tail = len(df) if same.all() else int(np.argmin(same[::-1]))
+
+        pending = table.slice(len(df) - n_tail).to_batches()
+        if n_tail < len(df):
+            yield df.iloc[:len(df) - n_tail]
+
+    if pending:
+        yield pa.Table.from_batches(pending).to_pandas()
@@ -0,0 +1,47 @@
+import numpy as np
+from numba import njit
+
+@njit(cache=True)
+def area2d(ys, zs, n, ref_y, ref_z):
+    """Area 2D dominada pelos n primeiros pontos (ys ordenado crescente) ate (ref_y, ref_z)."""
+    area  = 0.0
+    min_z = ref_z
+    for i in range(n):
+        if zs[i] < min_z:
+            min_z = zs[i]
+        next_y = ys[i + 1] if i + 1 < n else ref_y
+        area  += (next_y - ys[i]) * (ref_z - min_z)
+    return area
+
+@njit(cache=True)
+def hv3d(points, ref):
+    """Hypervolume (minimizacao) de `points` ordenado crescente por obj0, ate `ref`."""
+    n  = points.shape[0]
+    ys = np.empty(n)
+    zs = np.empty(n)
+    m  = 0
+    hv = 0.0
+
+    for i in range(n):
+        x, y, z = points[i, 0], points[i, 1], points[i, 2]
+        if x >= ref[0]:
+            break
+
+        # Insere (y, z) mantendo ys ordenado; pontos fora da referencia nao contribuem
+        if y < ref[1] and z < ref[2]:
+            k = m
+            while k > 0 and ys[k - 1] > y:
+                ys[k] = ys[k - 1]
+                zs[k] = zs[k - 1]
+                k -= 1
+            ys[k] = y
+            zs[k] = z
+            m += 1
+
+        # Fatia entre este ponto e o proximo no eixo obj0
+        next_x = ref[0]
+        if i + 1 < n and points[i + 1, 0] < ref[0]:
+            next_x = points[i + 1, 0]
+        hv += (next_x - x) * area2d(ys, zs, m, ref[1], ref[2])
+
+    return hv
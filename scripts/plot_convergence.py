@@ -1,11 +1,26 @@
-import pandas as pd
+import numpy as np
+import pyarrow as pa
+import matplotlib
+matplotlib.use("Agg")  # so gera PNGs; evita inicializar backend grafico
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 
+from csv_io import read_columns
+
 INPUT_FILE   = "evolucao_fitness.csv"
 OUTPUT_IMAGE = "analise_convergencia.png"
 
+# AvgFit nao e usado nos graficos
+CSV_DTYPES = {
+    "Size":       pa.int32(),
+    "Instance":   pa.int16(),
+    "Selection":  pa.dictionary(pa.int32(), pa.string()),
+    "Run":        pa.int16(),
+    "Generation": pa.int16(),
+    "BestFit":    pa.float32(),
+}
+
 def main():
     if not os.path.exists(INPUT_FILE):
         print(f"ERRO: '{INPUT_FILE}' nao encontrado.")
@@ -13,7 +28,7 @@ def main():
         return
 
     print(f"Lendo '{INPUT_FILE}'...")
-    df = pd.read_csv(INPUT_FILE)
+    df = read_columns(INPUT_FILE, CSV_DTYPES)
 
     df = df.dropna(subset=["Selection"])
 
@@ -21,27 +36,32 @@ def main():
         print("AVISO: coluna 'Instance' nao encontrada")
 
     sns.set_theme(style="whitegrid")
+    cmap = plt.get_cmap("viridis")
 
-    metodos = df["Selection"].unique()
-    fig, axes = plt.subplots(1, len(metodos), figsize=(7 * len(metodos), 6), sharey=False)
-    if len(metodos) == 1:
+    metodos   = df.groupby("Selection", sort=False, observed=True)
+    n_metodos = metodos.ngroups
+    fig, axes = plt.subplots(1, n_metodos, figsize=(7 * n_metodos, 6), sharey=False)
+    if n_metodos == 1:
         axes = [axes]
 
-    print(f"Gerando graficos de convergencia ({len(metodos)} metodo(s))...")
+    print(f"Gerando graficos de convergencia ({n_metodos} metodo(s))...")
 
-    for i, metodo in enumerate(metodos):
+    for i, (metodo, subset) in enumerate(metodos):
         ax = axes[i]
-        subset = df[df["Selection"] == metodo]
-
-        sns.lineplot(
-            data=subset,
-            x="Generation",
-            y="BestFit",
-            hue="Size",
-            palette="viridis",
-            ax=ax,
-            linewidth=2.0
-        )
+
+        # Agrega media e IC 95% por (Size, Generation) numa unica passada do pandas,
+        # em vez de deixar o seaborn reagregar (com bootstrap) dentro do lineplot
+        curves = subset.groupby(["Size", "Generation"], observed=True)["BestFit"].agg(["mean", "std", "count"])
+        sizes  = curves.index.unique(level="Size")
+        norm   = plt.Normalize(sizes.min(), sizes.max())
+
+        for size in sizes:
+            c     = curves.loc[size]
+            color = cmap(norm(size))
+            half  = 1.96 * c["std"] / np.sqrt(c["count"])
+            ax.plot(c.index, c["mean"], color=color, linewidth=2.0, label=str(size))
+            ax.fill_between(c.index, c["mean"] - half, c["mean"] + half,
+                            color=color, alpha=0.2, linewidth=0)
 
         n_inst = subset["Instance"].nunique() if "Instance" in subset.columns else 1
         n_runs = subset["Run"].nunique()
@@ -57,6 +77,7 @@ def main():
 
     plt.tight_layout()
     plt.savefig(OUTPUT_IMAGE, dpi=300)
+    plt.close(fig)
     print(f"\nSucesso! Grafico salvo em: '{OUTPUT_IMAGE}'")
 
 if __name__ == "__main__":
@@ -1,13 +1,33 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import matplotlib
+matplotlib.use("Agg")  # so gera PNGs; evita inicializar backend grafico
 import matplotlib.pyplot as plt
-from pymoo.indicators.hv import HV
-from pymoo.util.nds.non_dominated_sorting import NonDominatedSorting
 import os
 import argparse
+import hashlib
+from joblib import Parallel, delayed, parallel_config
+
+from csv_io import iter_chunks
+from hv3d import hv3d
 
 INPUT_FILE = "fronteira_pareto_completa.csv"
 
+# Referencia do HV: objetivos normalizados em [0, 1] e com sinal invertido
+REF_POINT = np.zeros(3)
+
+# So as colunas usadas no calculo do HV, com tipos compactos
+CSV_DTYPES = {
+    "Size":      pa.int32(),
+    "Instance":  pa.int16(),
+    "Selection": pa.dictionary(pa.int32(), pa.string()),
+    "Run":       pa.int16(),
+    "Obj1":      pa.float32(),
+    "Obj2":      pa.float32(),
+    "Obj3":      pa.float32(),
+}
+
 # ---------------------------------------------------------------------------
 # Dados do artigo: NSGA-III (Fig. 3 - Wangsom & Lavangnananda, 2018)
 # ---------------------------------------------------------------------------
@@ -24,87 +44,111 @@ COLORS = {
     "NSGA-III": "#EE7900",  
 }
 
-def calc_hv(df):
-    """Calcula HV por (Size, Instance, Selection, Run) e retorna dict[size][selection] = [hv,...]"""
-    if "Instance" not in df.columns:
-        df["Instance"] = 1
-
-    ref_point = np.array([0.0, 0.0, 0.0])
-    ind_hv    = HV(ref_point=ref_point)
-    nds       = NonDominatedSorting()
-    results   = {}
-
-    grouped = df.groupby(["Size", "Instance", "Selection", "Run"])
-    total   = len(grouped)
-    print(f"Calculando HV para {total} grupos...")
-
-    for count, (name, group) in enumerate(grouped, 1):
-        size, instance, selection, run = name
-
-        if count % max(1, total // 20) == 0:
-            print(f"  {int(count / total * 100):3d}%  ({count}/{total})")
-
-        points          = group[["Obj1", "Obj2", "Obj3"]].values
-        neg_points      = (points / (size * 100.0)) * -1.0
-
-        hv = 0.0
-        fronts = nds.do(neg_points)
-        if len(fronts) > 0:
-            hv = ind_hv(neg_points[fronts[0]])
-
-        results.setdefault(size, {}).setdefault(selection, []).append(hv)
-
-    return results
-
-def main():
-    parser = argparse.ArgumentParser(
-        description="Comparacao de HV: AEMMT Roleta x AEMMT Torneio x NSGA-III"
-    )
-    args = parser.parse_args()
-
-    OUTPUT_IMAGE = "comparacao_final_hv_todos.png"
-
-    if not os.path.exists(INPUT_FILE):
-        print(f"ERRO: '{INPUT_FILE}' nao encontrado. Rode './benchmark_app' primeiro.")
-        return
-
-    print(f"Lendo '{INPUT_FILE}'...")
-    df = pd.read_csv(INPUT_FILE)
-    df = df.dropna(subset=["Selection"])
-
-    results    = calc_hv(df)
-    sizes_list = [250, 500, 750, 1000]
-    metodos    = ["Roleta", "Torneio"]
-    stats      = ["Min", "Max", "Avg"]
-
-    # ---------------------------------------------------------------------------
-    # Vetores de valores para cada algoritmo
-    # ---------------------------------------------------------------------------
-    vals = {"Roleta": [], "Torneio": [], "NSGA-III": []}
-
-    print(f"\n--- RESULTADOS FINAIS ---")
-    print(f"{'Tamanho':>8}  {'Stat':>5}  {'Roleta':>8}  {'Torneio':>8}  {'NSGA-III':>8}")
-    print("-" * 50)
-
-    for s in sizes_list:
-        for stat in stats:
-            # AEMMT Roleta
-            data_r = results.get(s, {}).get("Roleta", [])
-            v_r = {"Min": np.min, "Max": np.max, "Avg": np.mean}[stat](data_r) if data_r else 0.0
-
-            # AEMMT Torneio
-            data_t = results.get(s, {}).get("Torneio", [])
-            v_t = {"Min": np.min, "Max": np.max, "Avg": np.mean}[stat](data_t) if data_t else 0.0
-
-            # NSGA-III artigo
-            v_n = nsga3_data[s][stat.lower()]
-
-            vals["Roleta"].append(v_r)
-            vals["Torneio"].append(v_t)
-            vals["NSGA-III"].append(v_n)
-
-            print(f"{s:>8}  {stat:>5}  {v_r:>8.4f}  {v_t:>8.4f}  {v_n:>8.4f}")
+def pareto_front(points):
+    """Primeira fronteira (minimizacao) sem pontos repetidos, ordenada lexicograficamente."""
+    P = points[np.lexsort(points.T[::-1])]
+
+    # Pontos repetidos ficam adjacentes e nao mudam o HV; fica so o primeiro de cada bloco
+    first = np.ones(len(P), dtype=bool)
+    first[1:] = np.any(P[1:] != P[:-1], axis=1)
+    U = P[first]
+
+    # Com a ordenacao lexicografica, um ponto so pode ser dominado por pontos
+    # anteriores, que ja sao <= no obj0; basta comparar obj1 e obj2.
+    weak      = (U[:, None, 1] <= U[None, :, 1]) & (U[:, None, 2] <= U[None, :, 2])
+    dominated = np.any(np.triu(weak, k=1), axis=0)
+    return U[~dominated]
+
+def compute_hv(size, selection, neg_points):
+    """HV de um grupo (Size, Instance, Selection, Run) ja normalizado e com sinal invertido."""
+    hv = 0.0
+    if len(neg_points) > 0:
+        # A fronteira ja sai ordenada por obj0, como o hv3d espera
+        hv = hv3d(pareto_front(neg_points), REF_POINT)
+    return size, selection, hv
+
+def calc_hv(chunks):
+    """Calcula HV por (Size, Instance, Selection, Run) e retorna um DataFrame (Size, Selection, HV).
+
+    `chunks` gera DataFrames com grupos completos; cada grupo deve aparecer em um so bloco.
+    """
+    seen  = set()
+    scale = {}  # Size -> -1 / (Size * 100): poucos tamanhos, fator calculado uma vez
+
+    def iter_inputs():
+        for df in chunks:
+            df = df.dropna(subset=["Selection"])
+            if "Instance" not in df.columns:
+                df = df.assign(Instance=1)
+
+            objs    = df[["Obj1", "Obj2", "Obj3"]].to_numpy(dtype=np.float32)
+            grouped = df.groupby(["Size", "Instance", "Selection", "Run"], sort=False, observed=True)
+            for name, idx in grouped.indices.items():
+                if name in seen:
+                    raise ValueError(f"Grupo {name} aparece em mais de um trecho do CSV")
+                seen.add(name)
+
+                size = name[0]
+                if size not in scale:
+                    scale[size] = np.float32(-1.0 / (size * 100.0))
+
+                # A indexacao ja copia as linhas do grupo; normaliza e inverte o sinal nessa copia
+                neg_points  = objs[idx]
+                neg_points *= scale[size]
+                yield size, name[2], neg_points
+
+    print("Calculando HV por grupo...")
+
+    # Grupos independentes: um processo por nucleo, sem threads do Numba dentro de cada worker.
+    # O Parallel consome o gerador aos poucos, entao so alguns blocos ficam em memoria.
+    with parallel_config(backend="loky", inner_max_num_threads=1):
+        out = Parallel(n_jobs=-1, batch_size="auto", return_as="generator")(
+            delayed(compute_hv)(*args) for args in iter_inputs()
+        )
+        hv_df = pd.DataFrame(list(out), columns=["Size", "Selection", "HV"])
+
+    print(f"HV calculado para {len(seen)} grupos.")
+    return hv_df
+
+def hv_table(hv_df, sizes_list, metodos):
+    """Arranja os HVs em um array float32 (tamanho, metodo, run), completado com NaN."""
+    i = pd.Index(sizes_list).get_indexer(hv_df["Size"])
+    j = pd.Index(metodos).get_indexer(hv_df["Selection"])
+    k = hv_df.groupby(["Size", "Selection"], sort=False, observed=True).cumcount().to_numpy()
+
+    keep   = (i >= 0) & (j >= 0)
+    n_runs = k[keep].max() + 1 if keep.any() else 0
+
+    hv_arr = np.full((len(sizes_list), len(metodos), n_runs), np.nan, dtype=np.float32)
+    hv_arr[i[keep], j[keep], k[keep]] = hv_df["HV"].to_numpy()[keep]
+    return hv_arr
+
+def load_hv():
+    """Le o CSV e calcula o HV, reaproveitando o cache em parquet se o CSV nao mudou."""
+    digest = hashlib.blake2b(digest_size=8)
+    with open(INPUT_FILE, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    cache_file = f"hv_cache_{digest.hexdigest()}.parquet"
+
+    if os.path.exists(cache_file):
+        print(f"Lendo HV do cache '{cache_file}'...")
+        return pd.read_parquet(cache_file)
+
+    print(f"Lendo '{INPUT_FILE}' em blocos...")
+    hv_df = calc_hv(iter_chunks(INPUT_FILE, CSV_DTYPES, ["Size", "Instance", "Selection", "Run"]))
+    hv_df.to_parquet(cache_file, index=False)
+    return hv_df
+
+# Graficos que podem ser gerados: metodo AEMMT -> (barras, imagem de saida)
+PLOTS = {
+    "Roleta":  (["Roleta"],            "comparacao_final_hv_roleta.png"),
+    "Torneio": (["Torneio"],           "comparacao_final_hv_torneio.png"),
+    "todos":   (["Roleta", "Torneio"], "comparacao_final_hv_todos.png"),
+}
 
+def plot_hv(vals, metodos, output_image, sizes_list, stats):
+    """Barras de HV dos metodos AEMMT escolhidos contra o NSGA-III."""
     group_gap   = 1.5
     current_pos = 0
     plot_pos    = []
@@ -118,13 +162,13 @@ def main():
         current_pos += group_gap
 
     plot_pos = np.array(plot_pos)
-    width    = 0.26   
 
-    fig, ax = plt.subplots(figsize=(16, 7))
+    keys    = metodos + ["NSGA-III"]
+    labels  = [f"AEMMT {m}" for m in metodos] + ["NSGA-III (Wangsom & Lavangnananda, 2018)"]
+    width   = 0.78 / len(keys)
+    offsets = (np.arange(len(keys)) - (len(keys) - 1) / 2) * width
 
-    offsets = [-width, 0, width]
-    labels  = ["AEMMT Roleta", "AEMMT Torneio", "NSGA-III (Wangsom & Lavangnananda, 2018)"]
-    keys    = ["Roleta", "Torneio", "NSGA-III"]
+    fig, ax = plt.subplots(figsize=(16, 7))
 
     rects_list = []
     for offset, key, label in zip(offsets, keys, labels):
@@ -133,7 +177,8 @@ def main():
             label=label,
             color=COLORS[key],
             edgecolor="black",
-            linewidth=0.6
+            linewidth=0.6,
+            rasterized=True
         )
         rects_list.append(r)
 
@@ -162,11 +207,11 @@ def main():
         ax.text(center, -ax.get_ylim()[1] * 0.07, f"{s} itens",
                 ha="center", va="top", fontsize=11, fontweight="bold")
 
-    max_val = max(max(v) for v in vals.values())
+    max_val = max(max(vals[k]) for k in keys)
     ax.set_ylim(0, max_val * 1.20)
     ax.set_ylabel("Hypervolume (normalizado)", fontsize=12)
     ax.set_title(
-        "AEMMT Roleta  vs  AEMMT Torneio  vs  NSGA-III\n"
+        "  vs  ".join(f"AEMMT {m}" for m in metodos) + "  vs  NSGA-III\n"
         "Metrica: Hypervolume normalizado — 20 instancias x 30 runs por tamanho",
         fontsize=13
     )
@@ -176,8 +221,67 @@ def main():
     ax.grid(axis="y", linestyle="--", alpha=0.5)
 
     plt.tight_layout()
-    plt.savefig(OUTPUT_IMAGE, dpi=300)
-    print(f"\nGrafico salvo em: '{OUTPUT_IMAGE}'")
+    plt.savefig(output_image, dpi=300)
+    plt.close(fig)
+    print(f"Grafico salvo em: '{output_image}'")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Comparacao de HV: AEMMT Roleta x AEMMT Torneio x NSGA-III"
+    )
+    parser.add_argument(
+        "--metodos", nargs="+", choices=list(PLOTS), default=["todos"],
+        help="graficos a gerar; o HV e calculado uma unica vez para todos (padrao: todos)"
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(INPUT_FILE):
+        print(f"ERRO: '{INPUT_FILE}' nao encontrado. Rode './benchmark_app' primeiro.")
+        return
+
+    sizes_list = [250, 500, 750, 1000]
+    metodos    = ["Roleta", "Torneio"]
+    stats      = ["Min", "Max", "Avg"]
+
+    # Estatisticas sobre as runs de cada (tamanho, metodo) de uma vez; sem runs -> 0.0
+    hv_arr = hv_table(load_hv(), sizes_list, metodos)
+    valid  = ~np.isnan(hv_arr)
+    n_runs = valid.sum(axis=-1)
+    has    = n_runs > 0
+    aemmt  = {
+        "Min": np.where(has, np.min(hv_arr, axis=-1, initial=np.inf, where=valid), 0.0),
+        "Max": np.where(has, np.max(hv_arr, axis=-1, initial=-np.inf, where=valid), 0.0),
+        "Avg": np.divide(np.nansum(hv_arr, axis=-1), n_runs, out=np.zeros(n_runs.shape), where=has),
+    }
+
+    # ---------------------------------------------------------------------------
+    # Vetores de valores para cada algoritmo
+    # ---------------------------------------------------------------------------
+    vals = {"Roleta": [], "Torneio": [], "NSGA-III": []}
+
+    print(f"\n--- RESULTADOS FINAIS ---")
+    print(f"{'Tamanho':>8}  {'Stat':>5}  {'Roleta':>8}  {'Torneio':>8}  {'NSGA-III':>8}")
+    print("-" * 50)
+
+    for i, s in enumerate(sizes_list):
+        for stat in stats:
+            # AEMMT Roleta e Torneio
+            v_r = float(aemmt[stat][i, 0])
+            v_t = float(aemmt[stat][i, 1])
+
+            # NSGA-III artigo
+            v_n = nsga3_data[s][stat.lower()]
+
+            vals["Roleta"].append(v_r)
+            vals["Torneio"].append(v_t)
+            vals["NSGA-III"].append(v_n)
+
+            print(f"{s:>8}  {stat:>5}  {v_r:>8.4f}  {v_t:>8.4f}  {v_n:>8.4f}")
+
+    print()
+    for metodo in args.metodos:
+        plot_metodos, output_image = PLOTS[metodo]
+        plot_hv(vals, plot_metodos, output_image, sizes_list, stats)
 
 if __name__ == "__main__":
     main()